@@ -11,16 +11,71 @@ import os
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
 
 import asyncio
-import edge_tts
+import atexit
+import io
 import re
 import json
 import hashlib
+import threading
+import time
 import warnings
-from datetime import datetime
+from itertools import islice
 
-# 启用 readline 支持（光标移动、历史记录）
+# edge_tts（连带 aiohttp）较重，推迟到真正合成时再导入，
+# 让 list 等纯元数据命令秒开
+
+# 可选的高速 JSON 序列化（没装则退回标准库 json）
 try:
-    import readline
+    import orjson
+except ImportError:
+    orjson = None
+
+# 可选的高速哈希（没装则退回 hashlib.blake2b）
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+async def _ainput(prompt):
+    """在守护线程里执行 input()，不阻塞事件循环
+
+    用守护线程而不是 asyncio.to_thread：Ctrl-C 时事件循环能直接退出，
+    解释器也不会在关闭时去 join 一个还卡在 stdin 上的工作线程。
+    """
+    loop = asyncio.get_running_loop()
+    fut = loop.create_future()
+
+    def _read():
+        try:
+            result = input(prompt)
+        except BaseException as e:
+            result = e
+
+        def _deliver():
+            if fut.done():
+                return
+            if isinstance(result, BaseException):
+                fut.set_exception(result)
+            else:
+                fut.set_result(result)
+
+        try:
+            loop.call_soon_threadsafe(_deliver)
+        except RuntimeError:
+            # 事件循环已经关了（比如 Ctrl-C 退出），结果直接丢弃
+            pass
+
+    threading.Thread(target=_read, daemon=True).start()
+    return await fut
+
+
+def _setup_readline():
+    """启用 readline 支持（光标移动、历史记录），仅交互模式需要"""
+    try:
+        import readline
+    except ImportError:
+        print("⚠️  readline 未安装，光标移动和历史记录功能不可用")
+        return None, None
     # 设置历史记录文件
     histfile = os.path.expanduser("~/.lafrance_history")
     try:
@@ -28,9 +83,8 @@ try:
         readline.set_history_length(1000)
     except FileNotFoundError:
         pass
-except ImportError:
-    readline = None
-    print("⚠️  readline 未安装，光标移动和历史记录功能不可用")
+    return readline, histfile
+
 
 # 尝试读取配置文件
 try:
@@ -52,6 +106,20 @@ FRENCH_VOICES = {
     "vivienne": "fr-FR-VivienneMultilingualNeural",  # 女声 - 多语言
 }
 
+# 声音性别表（直接查表，不用每次扫描 voice_id 字符串）
+_VOICE_GENDER = {
+    "henri": "男声",
+    "denise": "女声",
+    "eloise": "女声",
+    "remy": "男声",
+    "vivienne": "女声",
+}
+
+# 文件名清理用的正则（模块级编译，避免每次调用查缓存）
+_RE_SANITIZE = re.compile(r"[^\w\s\-']")
+_RE_WS = re.compile(r"\s+")
+
+
 class FrenchTTS:
     """法语语音生成器类"""
     
@@ -75,43 +143,126 @@ class FrenchTTS:
         self.output_dir = OUTPUT_DIR
         self.auto_play = AUTO_PLAY
         self.use_cache = use_cache
+
+        # 预计算缓存键里声音/语速/音量的哈希状态，每次只需补上文本
+        self._rebuild_hash_seed()
         
-        # 缓存文件路径
+        # 缓存文件路径（JSON 快照 + 追加式 JSONL 增量）
+        # 缓存内容延迟到首次访问再加载，list 等命令不用付 JSON 解析成本
         self.cache_file = os.path.join(self.output_dir, ".cache.json")
-        self.cache = self._load_cache()
+        self.cache_jsonl = self.cache_file + ".jsonl"
+        self._cache = None
+
+        # 新条目先追加到 JSONL，攒够一批再重写完整快照
+        self._pending = 0
+        self._compact_every = 32
+
+        # 本进程内已确认存在的缓存文件，命中后不再重复 stat
+        self._verified = set()
+        atexit.register(self._save_cache)
         
         # 确保输出目录存在
         os.makedirs(self.output_dir, exist_ok=True)
     
+    @property
+    def cache(self):
+        """缓存字典（首次访问时才从磁盘加载）"""
+        if self._cache is None:
+            self._cache = self._load_cache()
+        return self._cache
+
+    @cache.setter
+    def cache(self, value):
+        self._cache = value
+
     def _load_cache(self):
-        """加载缓存"""
+        """加载缓存（先读快照，再回放 JSONL 增量）"""
+        cache = {}
         if os.path.exists(self.cache_file):
             try:
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                with open(self.cache_file, 'rb') as f:
+                    data = f.read()
+                cache = orjson.loads(data) if orjson else json.loads(data)
             except:
-                return {}
-        return {}
-    
+                cache = {}
+        if os.path.exists(self.cache_jsonl):
+            try:
+                with open(self.cache_jsonl, 'rb') as f:
+                    for line in f:
+                        if line.strip():
+                            cache.update(orjson.loads(line) if orjson else json.loads(line))
+            except:
+                pass
+        return cache
+
     def _save_cache(self):
-        """保存缓存"""
+        """保存缓存（先写临时文件再原子替换，写一半崩溃也不丢数据）"""
+        if self._cache is None:
+            # 从未加载过缓存，磁盘上的内容就是最新的
+            return
         try:
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(self.cache, f, ensure_ascii=False, indent=2)
+            # 多个实例共享同一个缓存文件（如 demo 模式每种声音一个实例），
+            # 先把磁盘上的快照和增量合并进来，避免覆盖别的实例写的条目
+            merged = self._load_cache()
+            merged.update(self._cache)
+            self._cache = merged
+            tmp = self.cache_file + '.tmp'
+            if orjson:
+                # orjson 原生输出 UTF-8，一次性写入
+                with open(tmp, 'wb') as f:
+                    f.write(orjson.dumps(self._cache))
+            else:
+                # 先 dumps 再一次 write，比 json.dump 逐 token 写快得多
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    f.write(json.dumps(self._cache, ensure_ascii=False))
+            os.replace(tmp, self.cache_file)
+            # 快照已包含全部条目，增量文件可以清掉
+            if os.path.exists(self.cache_jsonl):
+                os.remove(self.cache_jsonl)
+            self._pending = 0
+        except Exception as e:
+            print(f"⚠️  缓存保存失败: {e}")
+
+    def _append_cache_entry(self, cache_key, path):
+        """追加单条缓存（O(1)，避免每次重写整个文件）"""
+        try:
+            entry = {cache_key: path}
+            if orjson:
+                line = orjson.dumps(entry) + b'\n'
+            else:
+                line = (json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8')
+            with open(self.cache_jsonl, 'ab') as f:
+                f.write(line)
+            self._pending += 1
+            if self._pending >= self._compact_every:
+                self._save_cache()
         except Exception as e:
             print(f"⚠️  缓存保存失败: {e}")
     
+    def _rebuild_hash_seed(self):
+        """重建哈希种子（切换声音/语速/音量后需要调用）"""
+        # xxh3 比 MD5 快一个数量级；退回的 blake2b 也明显快于 MD5
+        seed = xxhash.xxh3_64() if xxhash else hashlib.blake2b(digest_size=8)
+        seed.update(f"|{self.voice}|{self.rate}|{self.volume}".encode('utf-8'))
+        self._hash_seed = seed
+
     def _get_cache_key(self, text):
         """生成缓存键（基于文本内容+声音+语速）"""
-        content = f"{text}|{self.voice}|{self.rate}|{self.volume}"
-        return hashlib.md5(content.encode('utf-8')).hexdigest()[:16]
+        h = self._hash_seed.copy()
+        h.update(text.encode('utf-8'))
+        # 两种实现都输出 16 个十六进制字符，与旧键长度一致
+        return h.hexdigest()
     
     def clear_cache(self):
         """清除缓存"""
         count = len(self.cache)
         self.cache = {}
+        self._pending = 0
+        self._verified.clear()
         if os.path.exists(self.cache_file):
             os.remove(self.cache_file)
+        if os.path.exists(self.cache_jsonl):
+            os.remove(self.cache_jsonl)
         print(f"🗑️  已清除 {count} 条缓存")
     
     def show_cache_info(self):
@@ -121,19 +272,27 @@ class FrenchTTS:
         print(f"   缓存条目: {len(self.cache)}")
         if self.cache:
             print("   最近的条目:")
-            for i, (key, path) in enumerate(list(self.cache.items())[-5:], 1):
+            # 从尾部取 5 条即可，不用把整个字典物化成列表
+            recent = list(islice(reversed(self.cache.items()), 5))[::-1]
+            for i, (key, path) in enumerate(recent, 1):
                 filename = os.path.basename(path)
                 print(f"     {i}. {filename}")
         print()
     
+    def _make_communicate(self, text):
+        """构造 edge_tts 通信对象"""
+        import edge_tts  # 首次合成时才加载，之后只是 sys.modules 查表
+        return edge_tts.Communicate(
+            text=text,
+            voice=self.voice,
+            rate=self.rate,
+            volume=self.volume
+        )
+
     def _sanitize_filename(self, text, max_length=30):
         """清理文本，生成安全的文件名"""
-        # 移除或替换非法字符
-        import re
-        # 只保留字母、数字、空格和常见标点
-        cleaned = re.sub(r'[^\w\s\-\']', '', text)
-        # 替换多个空格为单个空格
-        cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+        # 只保留字母、数字、空格和常见标点，并压缩多余空格
+        cleaned = _RE_WS.sub(' ', _RE_SANITIZE.sub('', text)).strip()
         # 限制长度，取前几个单词
         words = cleaned.split()[:4]  # 最多取4个单词
         result = '_'.join(words)
@@ -165,19 +324,18 @@ class FrenchTTS:
         
         if self.use_cache and not force_regenerate and cache_key in self.cache:
             cached_path = self.cache[cache_key]
-            # 检查文件是否还存在
-            if os.path.exists(cached_path):
+            # 检查文件是否还存在（本次会话已确认过的不再 stat）
+            if cache_key in self._verified or os.path.exists(cached_path):
+                self._verified.add(cache_key)
                 # 缓存命中 - 无论 verbose 如何都静默播放
                 if play:
-                    self._play_audio(cached_path)
+                    await asyncio.to_thread(self._play_audio, cached_path)
                 return cached_path
-            else:
-                # 文件被删了，从缓存移除
-                del self.cache[cache_key]
+            # 文件被删了，走重新生成流程，下面会直接覆盖这条缓存
         
         # 生成新文件名
         if filename is None:
-            timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+            timestamp = time.strftime("%Y%m%d%H%M%S")
             content = self._sanitize_filename(text)
             filename = f"{timestamp}_{content}.mp3"
         
@@ -190,18 +348,13 @@ class FrenchTTS:
             print("🔊 ", end="", flush=True)
         
         # 创建 TTS 通信对象
-        communicate = edge_tts.Communicate(
-            text=text,
-            voice=self.voice,
-            rate=self.rate,
-            volume=self.volume
-        )
-        
-        # 保存音频文件（带进度动画）
-        import asyncio
+        communicate = self._make_communicate(text)
+
+        # 把音频流进内存（带进度动画），播放不用再从磁盘读回来
         spinner = ['⠋', '⠙', '⠹', '⠸', '⠼', '⠴', '⠦', '⠧', '⠇', '⠏']
+        audio_buf = io.BytesIO()
         done = False
-        
+
         async def show_spinner():
             i = 0
             while not done:
@@ -209,57 +362,96 @@ class FrenchTTS:
                     print(f"\r🔊 {spinner[i % len(spinner)]}", end="", flush=True)
                 await asyncio.sleep(0.1)
                 i += 1
-        
-        async def save_audio():
+
+        async def stream_audio():
             nonlocal done
-            await communicate.save(output_path)
-            done = True
-        
-        # 同时运行 spinner 和保存
-        await asyncio.gather(show_spinner(), save_audio())
-        
+            try:
+                async for chunk in communicate.stream():
+                    if chunk["type"] == "audio":
+                        audio_buf.write(chunk["data"])
+            finally:
+                done = True
+
+        # 同时运行 spinner 和流式接收
+        await asyncio.gather(show_spinner(), stream_audio())
+
+        audio_bytes = audio_buf.getvalue()
+
+        def _write_file():
+            with open(output_path, 'wb') as f:
+                f.write(audio_bytes)
+
+        # 磁盘写入放到后台线程，与播放重叠
+        write_task = asyncio.create_task(asyncio.to_thread(_write_file))
+
         if verbose:
             print(f"\r🔊 ████████ 100%")
             print(f"✅ 已生成: {output_path}")
-        
-        # 保存到缓存
+
+        # 自动播放（直接播内存里的音频，不等落盘）
+        if play:
+            await asyncio.to_thread(self._play_audio, io.BytesIO(audio_bytes))
+
+        await write_task
+
+        # 保存到缓存（文件已落盘）
         if self.use_cache:
             self.cache[cache_key] = output_path
-            self._save_cache()
-        
-        # 自动播放
-        if play:
-            self._play_audio(output_path)
-            
+            self._append_cache_entry(cache_key, output_path)
+
         return output_path
-    
-    def _play_audio(self, file_path):
-        """播放音频文件"""
+
+    async def speak_many(self, texts, concurrency=4):
+        """
+        批量合成多条文本（并发生成，不播放）
+
+        Args:
+            texts: 法语文本列表
+            concurrency: 同时进行的合成数（避免触发服务端限流）
+
+        Returns:
+            与 texts 一一对应的音频文件路径列表
+        """
+        sem = asyncio.Semaphore(concurrency)
+
+        async def _one(text):
+            async with sem:
+                return await self.speak(text, play=False, verbose=False)
+
+        paths = await asyncio.gather(*(_one(t) for t in texts))
+        # 批量结束后统一写一次快照，而不是每句一次
+        if self.use_cache and self._pending:
+            self._save_cache()
+        return paths
+
+    def _play_audio(self, source):
+        """播放音频（source 为文件路径或文件对象；阻塞，需在线程中调用）"""
         try:
             # 抑制 pygame 的警告
             import warnings
             warnings.filterwarnings("ignore", category=UserWarning)
-            
+
             # 尝试使用 pygame 播放（跨平台）
             import pygame
             pygame.mixer.init()
-            pygame.mixer.music.load(file_path)
+            pygame.mixer.music.load(source)
             pygame.mixer.music.play()
-            
-            # 等待播放完成
+
+            # 等待播放完成（wait 在 C 层休眠，不空转 CPU）
             while pygame.mixer.music.get_busy():
-                pygame.time.Clock().tick(10)
-                
+                pygame.time.wait(100)
+
         except Exception as e:
             print(f"⚠️  自动播放失败: {e}")
-            print(f"   请手动播放: {file_path}")
+            if isinstance(source, str):
+                print(f"   请手动播放: {source}")
     
     def list_voices(self):
         """列出所有可用的法语声音"""
         print("\n🎙️  可用的法语声音:")
         print("-" * 40)
         for name, voice_id in FRENCH_VOICES.items():
-            gender = "男声" if "Henri" in voice_id or "Remy" in voice_id else "女声"
+            gender = _VOICE_GENDER[name]
             print(f"  • {name:12} - {gender:6} ({voice_id})")
         print()
 
@@ -275,88 +467,149 @@ async def interactive_mode():
     print("\n" + "="*50)
     print("🥐  LaFrance - 法语语音生成器")
     print("="*50)
-    
+
+    readline, histfile = _setup_readline()
     tts = FrenchTTS()
     tts.list_voices()
-    
-    print("输入你要朗读的法语句子 (输入 'quit' 退出):")
-    print("-"*50)
-    
-    while True:
+
+    # 生产者/消费者：输入循环负责发起合成，player 按顺序播放，
+    # 这样上一句还在播放时下一句就能开始合成
+    play_queue = asyncio.Queue()
+
+    async def player():
+        while True:
+            path = await play_queue.get()
+            await asyncio.to_thread(tts._play_audio, path)
+            play_queue.task_done()
+
+    player_task = asyncio.create_task(player())
+    pending_tasks = set()
+
+    def _on_speak_done(task):
+        pending_tasks.discard(task)
         try:
-            text = input("\n🇫🇷 > ").strip()
-            
-            if text.lower() in ['quit', 'exit', 'q']:
-                print("Au revoir! 👋")
-                break
-            
-            if not text:
-                continue
-                
-            # 特殊命令
-            if text.startswith("/voice "):
-                voice = text.split()[1]
-                if voice in FRENCH_VOICES:
-                    tts.voice = FRENCH_VOICES[voice]
-                    print(f"✓ 已切换到: {voice}")
-                else:
-                    print(f"✗ 未知声音: {voice}")
-                    tts.list_voices()
-                continue
-            
-            if text.startswith("/rate "):
-                rate = text.split()[1]
-                tts.rate = rate
-                print(f"✓ 语速已设为: {rate}")
-                continue
-            
-            if text == "/help":
-                print("""
+            path = task.result()
+        except Exception as e:
+            print(f"❌ 错误: {e}")
+        else:
+            if tts.auto_play:
+                play_queue.put_nowait(path)
+
+    # 命令表：一次哈希查找完成分发，替代逐条 if/elif 字符串比较
+    def cmd_voice(arg):
+        if arg in FRENCH_VOICES:
+            tts.voice = FRENCH_VOICES[arg]
+            tts._rebuild_hash_seed()
+            print(f"✓ 已切换到: {arg}")
+        else:
+            print(f"✗ 未知声音: {arg}")
+            tts.list_voices()
+
+    def cmd_rate(arg):
+        tts.rate = arg
+        tts._rebuild_hash_seed()
+        print(f"✓ 语速已设为: {arg}")
+
+    def cmd_help(arg):
+        print("""
 📖 命令列表:
   /voice <name>  - 切换声音 (henri/denise/eloise/remy/vivienne)
   /rate <+/-n%>  - 调整语速 (/rate +20% 或 /rate -30%)
   /list          - 列出所有声音
   /cache         - 查看缓存信息
   /clear         - 清除缓存
+  /batch         - 批量输入多句（空行结束，并发生成后依次播放）
   !<text>        - 强制重新生成（如：!Bonjour）
   /help          - 显示帮助
   quit           - 退出
-                """)
-                continue
-            
-            if text == "/list":
-                tts.list_voices()
-                continue
-            
-            if text == "/cache":
-                tts.show_cache_info()
-                continue
-            
-            if text == "/clear":
-                tts.clear_cache()
-                continue
-            
-            # 检查是否强制重新生成
-            force_regenerate = False
-            if text.startswith("!"):
-                force_regenerate = True
-                text = text[1:].strip()
+        """)
+
+    async def cmd_batch(arg):
+        print("输入多行文本，空行结束:")
+        lines = []
+        while True:
+            line = (await _ainput("  + ")).strip()
+            if not line:
+                break
+            lines.append(line)
+        if lines:
+            print(f"🔊 批量生成 {len(lines)} 句...")
+            paths = await tts.speak_many(lines)
+            if tts.auto_play:
+                # 播放统一走 player 队列，避免两个线程抢 pygame.mixer.music
+                for path in paths:
+                    play_queue.put_nowait(path)
+                await play_queue.join()
+            print(f"✅ 完成，共 {len(paths)} 句")
+
+    commands = {
+        "/voice": cmd_voice,
+        "/rate": cmd_rate,
+        "/help": cmd_help,
+        "/list": lambda arg: tts.list_voices(),
+        "/cache": lambda arg: tts.show_cache_info(),
+        "/clear": lambda arg: tts.clear_cache(),
+        "/batch": cmd_batch,
+    }
+
+    print("输入你要朗读的法语句子 (输入 'quit' 退出):")
+    print("-"*50)
+
+    try:
+        while True:
+            try:
+                # input 放到守护线程里，等待输入时事件循环还能跑合成/播放任务
+                text = (await _ainput("\n🇫🇷 > ")).strip()
+
+                if text.lower() in ['quit', 'exit', 'q']:
+                    print("Au revoir! 👋")
+                    break
             
-            # 生成语音（新内容会显示进度，缓存命中则静默）
-            await tts.speak(text, force_regenerate=force_regenerate, verbose=True)
+                if not text:
+                    continue
+                
+                # 特殊命令：查表分发
+                if text.startswith("/"):
+                    cmd, _, arg = text.partition(' ')
+                    handler = commands.get(cmd)
+                    if handler is None:
+                        print(f"✗ 未知命令: {cmd}（输入 /help 查看命令列表）")
+                        continue
+                    result = handler(arg.strip())
+                    if asyncio.iscoroutine(result):
+                        await result
+                    continue
+
+                # 检查是否强制重新生成
+                force_regenerate = False
+                if text.startswith("!"):
+                    force_regenerate = True
+                    text = text[1:].strip()
             
-        except KeyboardInterrupt:
-            print("\nAu revoir! 👋")
-            break
-        except Exception as e:
-            print(f"❌ 错误: {e}")
-    
-    # 退出时保存历史记录
-    if readline:
-        try:
-            readline.write_history_file(histfile)
-        except:
-            pass
+                # 发起合成任务，播放交给 player，立刻回到输入提示符
+                task = asyncio.create_task(tts.speak(
+                    text, play=False, force_regenerate=force_regenerate, verbose=False
+                ))
+                pending_tasks.add(task)
+                task.add_done_callback(_on_speak_done)
+
+            except Exception as e:
+                print(f"❌ 错误: {e}")
+
+        # 等未完成的合成和播放收尾
+        if pending_tasks:
+            await asyncio.gather(*pending_tasks, return_exceptions=True)
+        await play_queue.join()
+        player_task.cancel()
+    finally:
+        # 退出时保存缓存和历史记录
+        # （Ctrl-C 退出走 os._exit 不经过 atexit，这里必须显式保存）
+        tts._save_cache()
+        if readline:
+            try:
+                readline.write_history_file(histfile)
+            except:
+                pass
 
 
 # 预设的法语学习例句
@@ -378,17 +631,28 @@ async def demo_mode():
     """演示模式 - 朗读所有学习例句"""
     print("\n🎬 演示模式 - 朗读法语学习例句\n")
     
-    # 不同声音朗读不同句子
+    # 不同声音朗读不同句子（每种声音只建一个实例，避免重复读缓存）
     voices = ["denise", "henri", "eloise"]
-    
-    for i, sentence in enumerate(SAMPLE_SENTENCES[:6], 1):
+    per_voice = {v: FrenchTTS(voice=v) for v in voices}
+
+    sentences = SAMPLE_SENTENCES[:6]
+
+    # 先并发生成（网络 I/O 可以重叠），再按顺序播放
+    tasks = []
+    for i, sentence in enumerate(sentences, 1):
+        voice = voices[i % len(voices)]
+        tasks.append(per_voice[voice].speak(
+            sentence, filename=f"demo_{i:02d}_{voice}.mp3",
+            play=False, verbose=False
+        ))
+    paths = await asyncio.gather(*tasks)
+
+    for i, (sentence, path) in enumerate(zip(sentences, paths), 1):
         voice = voices[i % len(voices)]
-        tts = FrenchTTS(voice=voice)
-        
         print(f"\n{i}. [{voice}] {sentence}")
-        await tts.speak(sentence, filename=f"demo_{i:02d}_{voice}.mp3", play=True)
+        await asyncio.to_thread(per_voice[voice]._play_audio, path)
         await asyncio.sleep(0.5)  # 停顿一下
-    
+
     print("\n✅ 演示完成！所有音频保存在 samples/ 目录")
 
 
@@ -418,5 +682,12 @@ if __name__ == "__main__":
             text = " ".join(sys.argv[1:])
             quick_speak(text)
     else:
-        # 交互模式
-        asyncio.run(interactive_mode())
+        # 交互模式（Ctrl-C 直接退出，input 线程是守护线程不用等）
+        try:
+            asyncio.run(interactive_mode())
+        except KeyboardInterrupt:
+            # 守护线程还卡在 stdin 的缓冲区锁上，正常收尾会触发
+            # 解释器 abort；该保存的都在 interactive_mode 里保存过了
+            print("\nAu revoir! 👋")
+            sys.stdout.flush()
+            os._exit(0)